@@ -1,14 +1,87 @@
+import json
+import queue
+import shlex
+import socket
 import threading
+import time
 import tkinter as tk
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import suppress
+from functools import partial
 from tkinter import ttk
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple, Union
+from urllib.parse import urlsplit
 
 DEFAULT_REMOTE_PORT = 5001
 # Prefer the hotspot-friendly mDNS hostname before other fallbacks.
 HOST_FALLBACKS = ("raspberrypi.local", "raspberrypi")
+# Seconds to skip a base URL after a connection failure.
+DEAD_BASE_TTL = 15.0
+# Seconds a working base URL is tried on its own before rebuilding the fallback list.
+BASE_STICKY_SECONDS = 30.0
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RequestTimeout = Union[float, Tuple[float, float]]
+# Minimum spacing between continuous drive POSTs while keys are held; stops are never delayed.
+DRIVE_DEBOUNCE_MS = 80
+# /api/manual/move replies only after the motion finishes, so its read timeout is the move time plus this margin.
+MOVE_CONNECT_TIMEOUT = 1.0
+MOVE_READ_MARGIN = 3.0
+# Bit assigned to each held direction in continuous mode.
+DIRECTION_BITS = {'forward': 1, 'back': 2, 'left': 4, 'right': 8}
+# Separates the address list from the API probe in the batched "Detect Base" output.
+DETECT_STATUS_MARKER = "--api-status--"
 
-import paramiko
 import requests
+from requests.adapters import HTTPAdapter
+
+from remote_helpers import SSHClientCache, discard_response, exec_ssh
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _json_dumps(payload: object) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+def _json_loads(data: bytes) -> object:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _move_timeout(direction: str, duration: float, angle: float) -> Tuple[float, float]:
+    if direction in ('left', 'right'):
+        # Turns run for angle / 90 seconds on the robot (90 degrees when no angle is given).
+        busy = (angle if angle > 0 else 90.0) / 90.0
+    else:
+        busy = duration
+    return MOVE_CONNECT_TIMEOUT, max(0.0, busy) + MOVE_READ_MARGIN
+
+
+def _drive_mix(mask: int) -> Tuple[float, float, float]:
+    # Unscaled (left, right, peak) wheel mix for a DIRECTION_BITS mask.
+    linear = 0.0
+    angular = 0.0
+    if mask & DIRECTION_BITS['forward']:
+        linear += 1.0
+    if mask & DIRECTION_BITS['back']:
+        linear -= 1.0
+    if mask & DIRECTION_BITS['left']:
+        angular += 1.0
+    if mask & DIRECTION_BITS['right']:
+        angular -= 1.0
+    left = linear - angular
+    right = linear + angular
+    return left, right, max(abs(left), abs(right))
+
+
+# Every combination of held directions, computed once at import.
+_DRIVE_LUT: Dict[int, Tuple[float, float, float]] = {mask: _drive_mix(mask) for mask in range(16)}
 
 
 class ManualControlFrame(ttk.Frame):
@@ -41,11 +114,18 @@ class ManualControlFrame(ttk.Frame):
             self.api_base = api_base_var
             if not self.api_base.get():
                 self.api_base.set(default_base)
+        # Worker threads read this copy instead of calling into Tcl for every request.
+        self._api_base_value = self.api_base.get().strip()
+        self._api_base_trace = self.api_base.trace_add("write", self._on_api_base_changed)
 
         if api_key_var is None:
             self.api_key = tk.StringVar(master=self, value="")
         else:
             self.api_key = api_key_var
+        self._cached_headers: Dict[str, str] = {}
+        self._cached_json_headers: Dict[str, str] = {}
+        self._rebuild_headers()
+        self._api_key_trace = self.api_key.trace_add("write", self._rebuild_headers)
 
         self.speed = tk.DoubleVar(master=self, value=0.4)
         self.duration = tk.DoubleVar(master=self, value=0.5)
@@ -72,72 +152,274 @@ class ManualControlFrame(ttk.Frame):
             self.ssh_password = ssh_password_var
 
         self.status_text = tk.StringVar(master=self, value="Idle")
+        self._pending_status: Optional[str] = None
+        self._status_scheduled = False
+        self._status_lock = threading.Lock()
         self.continuous_mode = tk.BooleanVar(master=self, value=False)
 
-        self._active_keys: Set[str] = set()
-        self._last_drive_command: Optional[tuple] = None
+        self._active_bits = 0
+        self._last_drive_command: Optional[Tuple[float, float]] = None
+        self._pending_drive: Optional[Tuple[float, float]] = None
+        self._drive_after_id: Optional[str] = None
+        self._pending_move: Optional["Future[None]"] = None
+        self._status_future: Optional["Future[None]"] = None
         self._last_remote_base: Optional[str] = None
+        self._last_success_at = 0.0
+        self._dead_bases: Dict[str, float] = {}
         self._ssh_discovered_ip: Optional[str] = None
+        self._ssh_clients = SSHClientCache()
+        self._base_cache: Optional[Tuple[tuple, List[str]]] = None
+        self._ssh_hosts_cache: Optional[Tuple[tuple, List[str]]] = None
+        self._probe_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="manual-probe")
+        # Button/key handlers hand their network work to these instead of spawning a thread per command.
+        self._http_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="manual-http")
+        # SSH sessions are slow; keep them off the HTTP workers so they cannot starve control traffic.
+        self._ssh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="manual-ssh")
+        # One keep-alive session for every API call instead of a new connection per command.
+        self._session = requests.Session()
+        # Sized for the HTTP and probe pools together; retries are handled by the base fallback logic.
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        # Single-slot queue: a newer drive command replaces one that has not been sent yet.
+        self._drive_slot: "queue.Queue[Optional[Dict[str, object]]]" = queue.Queue(maxsize=1)
+        self._drive_closed = threading.Event()
+        threading.Thread(target=self._drive_worker, name="manual-drive", daemon=True).start()
 
         self._build_ui()
         self._register_keybindings()
+        self.bind("<Destroy>", self._on_destroy, add="+")
 
     # --- HTTP helpers --------------------------------------------------
-    def _remote_headers(self) -> Dict[str, str]:
+    def _on_api_base_changed(self, *_args: object) -> None:
+        self._api_base_value = self.api_base.get().strip()
+
+    def _rebuild_headers(self, *_args: object) -> None:
         token = self.api_key.get().strip()
-        headers: Dict[str, str] = {}
-        if token:
-            headers["X-Api-Key"] = token
-        return headers
+        self._cached_headers = {"X-Api-Key": token} if token else {}
+        self._cached_json_headers = {**self._cached_headers, "Content-Type": "application/json"}
+
+    def _remote_headers(self) -> Dict[str, str]:
+        # Shared between requests and rebuilt on API key edits; callers must not mutate it.
+        return self._cached_headers
 
-    def _remote_request(self, method: str, path: str, *, timeout: float = 5.0, **kwargs) -> requests.Response:
+    def _remote_request(self, method: str, path: str, *, timeout: RequestTimeout = 5.0, **kwargs) -> requests.Response:
         headers = kwargs.pop("headers", None) or self._remote_headers()
-        candidates = self._candidate_base_urls()
-        if not candidates:
-            raise requests.RequestException("No remote endpoints configured")
+        idempotent = method.upper() in IDEMPOTENT_METHODS
 
         last_exc: Optional[requests.RequestException] = None
-        for base in candidates:
-            url = base + path
+        sticky = self._sticky_base()
+        if sticky:
             try:
-                response = requests.request(method, url, headers=headers, timeout=timeout, **kwargs)
-                response.raise_for_status()
+                return self._request_base(method, sticky, path, headers, timeout, kwargs)
             except requests.RequestException as exc:  # noqa: BLE001
+                # A POST that reached the robot may already be running; only retry elsewhere if it never connected.
+                if not (idempotent or isinstance(exc, requests.ConnectionError)):
+                    raise
                 last_exc = exc
-                continue
 
-            self._last_remote_base = base.rstrip('/')
-            host, _ = self._split_host_port(base)
-            if self._is_ipv4(host) and self._ssh_discovered_ip != host:
-                self._ssh_discovered_ip = host
-                self.after(0, lambda h=host: self.ssh_host.set(h))
-            if base != self.api_base.get().strip():
-                self.after(0, lambda b=base: self.api_base.set(b))
+        # Only build the fallback list when the recently working base did not answer.
+        bases = self._fallback_bases(sticky)
+        if idempotent and len(bases) > 1:
+            # Every candidate already gets the caller's full timeout in the race, so a loss is final.
+            base, response = self._race_bases(method, path, bases, headers, timeout, kwargs)
+            self._record_success(base)
             return response
 
+        for base in bases:
+            try:
+                return self._request_base(method, base, path, headers, timeout, kwargs)
+            except requests.RequestException as exc:  # noqa: BLE001
+                if not (idempotent or isinstance(exc, requests.ConnectionError)):
+                    raise
+                last_exc = exc
+
         if last_exc:
             raise last_exc
-        raise requests.RequestException("Remote request failed")
+        raise requests.RequestException("No remote endpoints configured")
 
-    def _post_async(self, path: str, payload: Optional[Dict[str, object]], description: Optional[str]) -> None:
-        def worker() -> None:
-            try:
-                response = self._remote_request("POST", path, json=payload, timeout=5)
-            except requests.HTTPError as exc:
-                status = exc.response.status_code if exc.response is not None else "?"
-                body = exc.response.json() if exc.response is not None else {}
-                self._log(f"⚠️ Request failed ({status}): {body or exc}")
-            except requests.RequestException as exc:  # noqa: BLE001
-                self._log(f"⚠️ Request error: {exc}")
-            else:
-                if description:
+    def _request_base(
+        self,
+        method: str,
+        base: str,
+        path: str,
+        headers: Dict[str, str],
+        timeout: RequestTimeout,
+        kwargs: Dict[str, object],
+    ) -> requests.Response:
+        try:
+            response = self._session.request(method, base + path, headers=headers, timeout=timeout, **kwargs)
+            response.raise_for_status()
+        except requests.ConnectionError:
+            # Connect timeouts land here too; a read timeout only means the robot is busy, not gone.
+            self._record_failure(base)
+            raise
+        self._record_success(base)
+        return response
+
+    def _race_bases(
+        self,
+        method: str,
+        path: str,
+        bases: List[str],
+        headers: Dict[str, str],
+        timeout: RequestTimeout,
+        kwargs: Dict[str, object],
+    ) -> Tuple[str, requests.Response]:
+        futures = {
+            self._probe_pool.submit(self._session.request, method, base + path, headers=headers, timeout=timeout, **kwargs): base
+            for base in bases
+        }
+        winner: Optional[Future] = None
+        last_exc: Optional[requests.RequestException] = None
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        deadline = time.monotonic() + connect_timeout + read_timeout
+        pending = set(futures)
+        try:
+            while pending and winner is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    base = futures[future]
                     try:
-                        payload_desc = response.json()
-                    except Exception:  # noqa: BLE001
-                        payload_desc = response.text
-                    self._log(f"✅ {description} -> {payload_desc}")
+                        response = future.result()
+                        response.raise_for_status()
+                    except requests.ConnectionError as exc:
+                        # Read timeouts are not recorded here; the host may just be busy.
+                        self._record_failure(base)
+                        last_exc = exc
+                    except requests.RequestException as exc:  # noqa: BLE001
+                        last_exc = exc
+                    else:
+                        winner = future
+                        break
+        finally:
+            for future in futures:
+                if future is not winner:
+                    future.cancel()
+                    future.add_done_callback(discard_response)
+
+        if winner is not None:
+            return futures[winner], winner.result()
+        if last_exc:
+            raise last_exc
+        raise requests.Timeout("No remote endpoint answered the probe")
+
+    def _sticky_base(self) -> Optional[str]:
+        sticky = self._last_remote_base
+        if not sticky or time.monotonic() - self._last_success_at >= BASE_STICKY_SECONDS:
+            return None
+        # A manual edit of the base URL always wins over the remembered endpoint.
+        if sticky != self._api_base_value:
+            return None
+        return sticky
+
+    def _fallback_bases(self, sticky: Optional[str]) -> List[str]:
+        now = time.monotonic()
+        candidates = self._candidate_base_urls()
+        live = [base for base in candidates if base != sticky and self._dead_bases.get(base, 0.0) <= now]
+        if not live and sticky is None:
+            # Everything failed recently; retry the full list rather than giving up.
+            live = candidates
+        return live
+
+    def _record_failure(self, base: str) -> None:
+        self._dead_bases[base] = time.monotonic() + DEAD_BASE_TTL
+        if base == self._last_remote_base:
+            self._last_success_at = 0.0
+
+    def _record_success(self, base: str) -> None:
+        self._dead_bases.pop(base, None)
+        self._last_success_at = time.monotonic()
+        self._last_remote_base = base.rstrip('/')
+        host, _ = self._split_host_port(base)
+        if self._is_ipv4(host) and self._ssh_discovered_ip != host:
+            self._ssh_discovered_ip = host
+            self.after(0, lambda h=host: self.ssh_host.set(h))
+        if base != self._api_base_value:
+            self.after(0, lambda b=base: self.api_base.set(b))
+
+    def _post_async(
+        self,
+        path: str,
+        payload: Optional[Dict[str, object]],
+        description: Optional[str],
+        timeout: RequestTimeout = 5,
+    ) -> "Future[None]":
+        return self._http_pool.submit(self._post_now, path, payload, description, timeout)
+
+    def _post_now(
+        self,
+        path: str,
+        payload: Optional[Dict[str, object]],
+        description: Optional[str],
+        timeout: RequestTimeout = 5,
+    ) -> None:
+        try:
+            if payload is None:
+                response = self._remote_request("POST", path, timeout=timeout)
+            else:
+                response = self._remote_request(
+                    "POST", path, data=_json_dumps(payload), headers=self._cached_json_headers, timeout=timeout
+                )
+        except requests.HTTPError as exc:
+            status = exc.response.status_code if exc.response is not None else "?"
+            body: object = {}
+            if exc.response is not None:
+                try:
+                    body = _json_loads(exc.response.content)
+                except ValueError:
+                    # Proxies and Flask debug pages answer errors with empty or HTML bodies.
+                    body = {"error": exc.response.text[:200]}
+            self._log(f"⚠️ Request failed ({status}): {body or exc}")
+        except requests.RequestException as exc:  # noqa: BLE001
+            self._log(f"⚠️ Request error: {exc}")
+        else:
+            if description:
+                try:
+                    payload_desc = _json_loads(response.content)
+                except Exception:  # noqa: BLE001
+                    payload_desc = response.text
+                self._log(f"✅ {description} -> {payload_desc}")
+
+    def _drive_worker(self) -> None:
+        while True:
+            payload = self._drive_slot.get()
+            if payload is not None:
+                # This is the only drive thread; an unexpected error must not stop continuous drive for good.
+                try:
+                    self._post_now('/api/manual/drive', payload, None)
+                except Exception as exc:  # noqa: BLE001
+                    # During teardown the Tk calls behind _log fail too.
+                    with suppress(Exception):
+                        self._log(f"⚠️ Drive command failed: {exc}")
+            if self._drive_closed.is_set() and self._drive_slot.empty():
+                return
 
-        threading.Thread(target=worker, daemon=True).start()
+    def _queue_drive(self, payload: Dict[str, object]) -> None:
+        # Only the Tk thread produces, so after displacing the stale entry the put cannot fail.
+        with suppress(queue.Empty):
+            self._drive_slot.get_nowait()
+        self._drive_slot.put_nowait(payload)
+
+    def _on_destroy(self, event: tk.Event) -> None:
+        if event.widget is not self:
+            return
+        with suppress(tk.TclError):
+            self.api_key.trace_remove("write", self._api_key_trace)
+            self.api_base.trace_remove("write", self._api_base_trace)
+        self._cancel_pending_drive()
+        # Let a queued final command (usually a stop) go out before the worker exits.
+        self._drive_closed.set()
+        with suppress(queue.Full):
+            self._drive_slot.put_nowait(None)
+        # Pool workers are not daemon threads; drop queued jobs so closing the window does not wait on them.
+        for pool in (self._http_pool, self._ssh_pool, self._probe_pool):
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._ssh_clients.close_all()
+        self._session.close()
 
     # --- UI construction -------------------------------------------------
     def _build_ui(self) -> None:
@@ -197,11 +479,11 @@ class ManualControlFrame(ttk.Frame):
             ("right", "Right", 1, 2),
         ]
         for direction, label, row, column in button_specs:
-            btn = ttk.Button(buttons, text=label, command=lambda d=direction: self._send_discrete_move(d))
+            btn = ttk.Button(buttons, text=label, command=partial(self._send_discrete_move, direction))
             btn.grid(row=row, column=column, padx=10, pady=6, sticky="ew")
-            btn.bind("<ButtonPress-1>", lambda event, d=direction: self._handle_button_press(event, d))
-            btn.bind("<ButtonRelease-1>", lambda event, d=direction: self._handle_button_release(event, d))
-            btn.bind("<Leave>", lambda event, d=direction: self._handle_button_leave(event, d))
+            btn.bind("<ButtonPress-1>", partial(self._handle_button_press, direction=direction))
+            btn.bind("<ButtonRelease-1>", partial(self._handle_button_release, direction=direction))
+            btn.bind("<Leave>", partial(self._handle_button_leave, direction=direction))
 
         ttk.Button(buttons, text="Stop", command=self._handle_stop_button).grid(row=1, column=1, padx=10, pady=6, sticky="ew")
 
@@ -219,54 +501,31 @@ class ManualControlFrame(ttk.Frame):
         self.rowconfigure(5, weight=1)
 
     def _register_keybindings(self) -> None:
-        self.root.bind("<KeyPress-Up>", lambda event: self._handle_key_press("forward"))
-        self.root.bind("<KeyRelease-Up>", lambda event: self._handle_key_release("forward"))
-        self.root.bind("<KeyPress-Down>", lambda event: self._handle_key_press("back"))
-        self.root.bind("<KeyRelease-Down>", lambda event: self._handle_key_release("back"))
-        self.root.bind("<KeyPress-Left>", lambda event: self._handle_key_press("left"))
-        self.root.bind("<KeyRelease-Left>", lambda event: self._handle_key_release("left"))
-        self.root.bind("<KeyPress-Right>", lambda event: self._handle_key_press("right"))
-        self.root.bind("<KeyRelease-Right>", lambda event: self._handle_key_release("right"))
+        self.root.bind("<KeyPress-Up>", partial(self._handle_key_press, "forward"))
+        self.root.bind("<KeyRelease-Up>", partial(self._handle_key_release, "forward"))
+        self.root.bind("<KeyPress-Down>", partial(self._handle_key_press, "back"))
+        self.root.bind("<KeyRelease-Down>", partial(self._handle_key_release, "back"))
+        self.root.bind("<KeyPress-Left>", partial(self._handle_key_press, "left"))
+        self.root.bind("<KeyRelease-Left>", partial(self._handle_key_release, "left"))
+        self.root.bind("<KeyPress-Right>", partial(self._handle_key_press, "right"))
+        self.root.bind("<KeyRelease-Right>", partial(self._handle_key_release, "right"))
         self.root.bind("<space>", self._on_space)
 
     # --- Networking helpers ---------------------------------------------
-    def _candidate_ssh_hosts(self) -> List[str]:
-        candidates: List[str] = []
-        manual_entry = self.ssh_host.get().strip()
-        if manual_entry:
-            candidates.append(manual_entry)
-
-        if self._ssh_discovered_ip:
-            candidates.append(self._ssh_discovered_ip)
-
-        api_host, _ = self._split_host_port(self.api_base.get().strip())
-        if api_host:
-            candidates.append(api_host)
-
-        for alias in HOST_FALLBACKS:
-            candidates.append(alias)
-
-        unique: List[str] = []
-        seen: Set[str] = set()
-        for value in candidates:
-            entry = value.strip()
-            if not entry or entry in seen:
-                continue
-            seen.add(entry)
-            unique.append(entry)
-        return unique
-
     def _check_status(self) -> None:
+        # Repeated clicks while a probe is outstanding share its result instead of queueing more GETs.
+        if self._status_future is not None and not self._status_future.done():
+            return
 
         def worker() -> None:
             try:
                 response = self._remote_request("GET", "/api/manual/status", timeout=4)
-                body = response.json()
+                body = _json_loads(response.content)
                 self._log(f"Status: {body}")
             except requests.RequestException as exc:
                 self._log(f"⚠️ Status check failed: {exc}")
 
-        threading.Thread(target=worker, daemon=True).start()
+        self._status_future = self._http_pool.submit(worker)
 
     # --- Command helpers ------------------------------------------------
     def _send_discrete_move(self, direction: str) -> None:
@@ -277,44 +536,51 @@ class ManualControlFrame(ttk.Frame):
             'angle': self.angle.get(),
         }
         self._log(f"Sending {direction} command...")
-        self._post_async('/api/manual/move', payload, f"Move {direction}")
+        # A move still waiting for a worker is stale once the user picks another one.
+        if self._pending_move is not None:
+            self._pending_move.cancel()
+        timeout = _move_timeout(direction, payload['duration'], payload['angle'])
+        self._pending_move = self._post_async('/api/manual/move', payload, f"Move {direction}", timeout)
 
-    def _handle_key_press(self, direction: str) -> None:
+    def _handle_key_press(self, direction: str, _event: Optional[tk.Event] = None) -> None:
         if self.continuous_mode.get():
-            if direction not in self._active_keys:
-                self._active_keys.add(direction)
+            bit = DIRECTION_BITS[direction]
+            if not self._active_bits & bit:
+                self._active_bits |= bit
                 self._update_continuous_drive()
         else:
             self._send_discrete_move(direction)
 
-    def _handle_key_release(self, direction: str) -> None:
+    def _handle_key_release(self, direction: str, _event: Optional[tk.Event] = None) -> None:
         if not self.continuous_mode.get():
             return
-        if direction in self._active_keys:
-            self._active_keys.remove(direction)
+        bit = DIRECTION_BITS[direction]
+        if self._active_bits & bit:
+            self._active_bits &= ~bit
             self._update_continuous_drive()
 
     def _handle_button_press(self, _event: tk.Event, direction: str) -> Optional[str]:
         if not self.continuous_mode.get():
             return None
-        if direction not in self._active_keys:
-            self._active_keys.add(direction)
+        bit = DIRECTION_BITS[direction]
+        if not self._active_bits & bit:
+            self._active_bits |= bit
             self._update_continuous_drive()
         return "break"
 
     def _handle_button_release(self, _event: tk.Event, direction: str) -> Optional[str]:
         if not self.continuous_mode.get():
             return None
-        if direction in self._active_keys:
-            self._active_keys.remove(direction)
+        self._active_bits &= ~DIRECTION_BITS[direction]
         self._update_continuous_drive()
         return "break"
 
     def _handle_button_leave(self, _event: tk.Event, direction: str) -> None:
         if not self.continuous_mode.get():
             return
-        if direction in self._active_keys:
-            self._active_keys.remove(direction)
+        bit = DIRECTION_BITS[direction]
+        if self._active_bits & bit:
+            self._active_bits &= ~bit
             self._update_continuous_drive()
 
     def _handle_stop_button(self) -> None:
@@ -326,8 +592,8 @@ class ManualControlFrame(ttk.Frame):
 
     def _handle_space(self) -> None:
         if self.continuous_mode.get():
-            self._active_keys.clear()
-            self._last_drive_command = None
+            self._active_bits = 0
+            self._cancel_pending_drive()
             self._send_drive(0.0, 0.0)
         self._send_stop()
 
@@ -335,60 +601,67 @@ class ManualControlFrame(ttk.Frame):
         if not self.continuous_mode.get():
             return
 
-        if not self._active_keys:
-            if self._last_drive_command != (0.0, 0.0):
-                self._send_drive(0.0, 0.0)
-                self._last_drive_command = (0.0, 0.0)
+        if not self._active_bits:
+            self._cancel_pending_drive()
+            if self._send_drive(0.0, 0.0):
                 self._log("Continuous: stop")
             return
 
         base_speed = max(0.0, min(1.0, float(self.speed.get())))
-        linear = 0.0
-        angular = 0.0
-        if 'forward' in self._active_keys:
-            linear += 1.0
-        if 'back' in self._active_keys:
-            linear -= 1.0
-        if 'left' in self._active_keys:
-            angular += 1.0
-        if 'right' in self._active_keys:
-            angular -= 1.0
-
-        linear *= base_speed
-        angular *= base_speed
-
-        left = linear - angular
-        right = linear + angular
-
-        max_mag = max(abs(left), abs(right))
+        left_mix, right_mix, peak = _DRIVE_LUT[self._active_bits]
+        left = left_mix * base_speed
+        right = right_mix * base_speed
+
+        # Normalising by the peak keeps both wheels within [-1, 1] without a separate clamp.
+        max_mag = peak * base_speed
         if max_mag > 1.0:
             left /= max_mag
             right /= max_mag
 
-        left = max(-1.0, min(1.0, left))
-        right = max(-1.0, min(1.0, right))
-
         quantized = (round(left, 3), round(right, 3))
-        if quantized == self._last_drive_command:
+        latest = self._pending_drive if self._pending_drive is not None else self._last_drive_command
+        if quantized == latest:
             return
 
-        self._last_drive_command = quantized
-        self._send_drive(left, right)
         self._log(f"Continuous: left={quantized[0]:.2f} right={quantized[1]:.2f}")
-
-    def _send_drive(self, left: float, right: float) -> None:
+        if self._drive_after_id is not None:
+            # Inside the debounce window: remember the latest mix and let the timer send it.
+            self._pending_drive = quantized
+            return
+        if self._send_drive(*quantized):
+            self._drive_after_id = self.after(DRIVE_DEBOUNCE_MS, self._flush_pending_drive)
+
+    def _flush_pending_drive(self) -> None:
+        self._drive_after_id = None
+        pending, self._pending_drive = self._pending_drive, None
+        if pending is not None and self._send_drive(*pending):
+            self._drive_after_id = self.after(DRIVE_DEBOUNCE_MS, self._flush_pending_drive)
+
+    def _cancel_pending_drive(self) -> None:
+        self._pending_drive = None
+        if self._drive_after_id is not None:
+            with suppress(tk.TclError):
+                self.after_cancel(self._drive_after_id)
+            self._drive_after_id = None
+
+    def _send_drive(self, left: float, right: float) -> bool:
+        # Every drive path dedupes here, so repeated stops while idle never reach the network.
+        command = (round(left, 3), round(right, 3))
+        if command == self._last_drive_command:
+            return False
+        self._last_drive_command = command
         payload = {
-            'left_speed': round(left, 3),
-            'right_speed': round(right, 3),
+            'left_speed': command[0],
+            'right_speed': command[1],
         }
-        self._post_async('/api/manual/drive', payload, None)
+        self._queue_drive(payload)
+        return True
 
     def _on_continuous_toggled(self) -> None:
         self.focus_set()
         if not self.continuous_mode.get():
-            if self._active_keys:
-                self._active_keys.clear()
-            self._last_drive_command = None
+            self._active_bits = 0
+            self._cancel_pending_drive()
             self._send_drive(0.0, 0.0)
             self._send_stop()
             self._log("Continuous mode disabled.")
@@ -417,27 +690,24 @@ class ManualControlFrame(ttk.Frame):
                 return
             self._log(f"Connecting to {user}@{host}...")
             try:
-                client = paramiko.SSHClient()
-                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                client.connect(hostname=host, username=user, password=password, timeout=10)
+                client = self._ssh_clients.get(host, user, password)
                 remote_cmd = (
                     "bash -lc 'cd ~/Capstone-CST498 && "
                     "source .venv311/bin/activate && "
                     "cd flask_api && "
                     "nohup python app.py >/tmp/rc_manual.log 2>&1 &'"
                 )
-                stdin, stdout, stderr = client.exec_command(remote_cmd)
-                exit_code = stdout.channel.recv_exit_status()
-                client.close()
+                exit_code, _, error_output = exec_ssh(client, remote_cmd)
                 if exit_code == 0:
                     self._log("✅ Flask API started (remote)")
                 else:
-                    error_output = stderr.read().decode().strip()
+                    error_output = error_output.strip()
                     self._log(f"⚠️ Remote start failed: {error_output or 'exit code ' + str(exit_code)}")
             except Exception as exc:  # noqa: BLE001
+                self._ssh_clients.drop(host, user)
                 self._log(f"⚠️ SSH error: {exc}")
 
-        threading.Thread(target=worker, daemon=True).start()
+        self._ssh_pool.submit(worker)
 
     def _stop_remote_api(self) -> None:
         def worker() -> None:
@@ -449,18 +719,15 @@ class ManualControlFrame(ttk.Frame):
                 return
             self._log(f"Stopping API on {host}...")
             try:
-                client = paramiko.SSHClient()
-                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                client.connect(hostname=host, username=user, password=password, timeout=10)
+                client = self._ssh_clients.get(host, user, password)
                 remote_cmd = "bash -lc 'pkill -f \"flask_api/app.py\" || pkill -f \"python app.py\"'"
-                stdin, stdout, stderr = client.exec_command(remote_cmd)
-                stdout.channel.recv_exit_status()
-                client.close()
+                exec_ssh(client, remote_cmd)
                 self._log("✅ Flask API stop signal sent")
             except Exception as exc:  # noqa: BLE001
+                self._ssh_clients.drop(host, user)
                 self._log(f"⚠️ SSH error: {exc}")
 
-        threading.Thread(target=worker, daemon=True).start()
+        self._ssh_pool.submit(worker)
 
     # --- Logging --------------------------------------------------------
     def _discover_remote_base(self) -> None:
@@ -476,21 +743,24 @@ class ManualControlFrame(ttk.Frame):
             for host in candidates:
                 self._log(f"Detecting API endpoint via {user}@{host}...")
                 try:
-                    client = paramiko.SSHClient()
-                    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                    client.connect(hostname=host, username=user, password=password, timeout=10)
+                    client = self._ssh_clients.get(host, user, password)
+                    # One round trip reports the addresses and whether the API already answers locally.
                     detect_cmd = (
-                        "set -o pipefail; "
-                        "(hostname -I || ip -o addr show | awk '{print $4}')"
+                        "(hostname -I || ip -o addr show | awk '{print $4}'); "
+                        f"echo {DETECT_STATUS_MARKER}; "
+                        "curl -s -m 1 -o /dev/null -w '%{http_code}' "
+                        f"http://127.0.0.1:{DEFAULT_REMOTE_PORT}/api/manual/status || true"
                     )
-                    stdin, stdout, stderr = client.exec_command(f"bash -lc \"{detect_cmd}\"")
-                    output = stdout.read().decode().strip()
-                    error_output = stderr.read().decode().strip()
-                    client.close()
+                    _, raw_output, error_output = exec_ssh(client, f"bash -lc {shlex.quote(detect_cmd)}")
+                    error_output = error_output.strip()
                 except Exception as exc:  # noqa: BLE001
+                    self._ssh_clients.drop(host, user)
                     last_error = exc
                     continue
 
+                output, _, status_code = raw_output.partition(DETECT_STATUS_MARKER)
+                output = output.strip()
+                api_running = status_code.strip() not in ("", "000")
                 if not output and error_output:
                     last_error = RuntimeError(error_output)
                     continue
@@ -511,32 +781,56 @@ class ManualControlFrame(ttk.Frame):
 
                 base = self._format_base_url(address)
                 self._last_remote_base = base.rstrip('/')
+                if api_running:
+                    # The API answered on the robot itself, so skip re-probing it from here.
+                    self._dead_bases.pop(self._last_remote_base, None)
+                    self._last_success_at = time.monotonic()
+                api_note = " API is running." if api_running else ""
                 if self._is_ipv4(address):
-                    self._log(f"✅ Detected IPv4 {address}; updated SSH host and API base.")
+                    self._log(f"✅ Detected IPv4 {address}; updated SSH host and API base.{api_note}")
                 else:
-                    self._log(f"✅ Detected address {address}; updated API base.")
+                    self._log(f"✅ Detected address {address}; updated API base.{api_note}")
                 self.after(0, lambda: self.api_base.set(base))
                 return
 
             message = f"SSH detection failed: {last_error}" if last_error else "SSH detection failed."
             self._log(f"⚠️ {message}")
 
-        threading.Thread(target=worker, daemon=True).start()
+        self._ssh_pool.submit(worker)
 
     # --- Logging --------------------------------------------------------
     def _log(self, message: str) -> None:
-        self.after(0, lambda: self.status_text.set(message))
+        # Only the newest status is shown, so bursts collapse into one Tk update per idle pass.
+        with self._status_lock:
+            self._pending_status = message
+            schedule = not self._status_scheduled
+            self._status_scheduled = True
+        if schedule:
+            self.after_idle(self._flush_status)
+
+    def _flush_status(self) -> None:
+        with self._status_lock:
+            self._status_scheduled = False
+            message, self._pending_status = self._pending_status, None
+        if message is not None:
+            self.status_text.set(message)
 
     def _candidate_ssh_hosts(self) -> List[str]:
-        candidates: List[str] = []
         manual_entry = self.ssh_host.get().strip()
+        api_base = self._api_base_value
+        key = (manual_entry, api_base, self._ssh_discovered_ip)
+        cached = self._ssh_hosts_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        candidates: List[str] = []
         if manual_entry:
             candidates.append(manual_entry)
 
         if self._ssh_discovered_ip:
             candidates.append(self._ssh_discovered_ip)
 
-        api_host, _ = self._split_host_port(self.api_base.get().strip())
+        api_host, _ = self._split_host_port(api_base)
         if api_host:
             candidates.append(api_host)
 
@@ -551,10 +845,17 @@ class ManualControlFrame(ttk.Frame):
                 continue
             seen.add(entry)
             unique.append(entry)
+        self._ssh_hosts_cache = (key, unique)
         return unique
 
     def _candidate_base_urls(self) -> List[str]:
-        raw = self.api_base.get().strip()
+        # Rebuilt only when one of its inputs changes; callers must not mutate the result.
+        raw = self._api_base_value
+        key = (raw, self._last_remote_base, self._ssh_discovered_ip)
+        cached = self._base_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
         host, port = self._split_host_port(raw)
 
         entries: List[str] = []
@@ -580,17 +881,18 @@ class ManualControlFrame(ttk.Frame):
                 continue
             seen.add(formatted)
             candidates.append(formatted.rstrip('/'))
+        self._base_cache = (key, candidates)
         return candidates
 
     def _normalized_base_url(self) -> str:
         candidates = self._candidate_base_urls()
         if not candidates:
-            normalized = self._format_base_url(self.api_base.get().strip())
+            normalized = self._format_base_url(self._api_base_value)
             if normalized:
                 self.after(0, lambda: self.api_base.set(normalized))
             return normalized
         first = candidates[0]
-        if first != self.api_base.get().strip():
+        if first != self._api_base_value:
             self.after(0, lambda b=first: self.api_base.set(b))
         return first
 
@@ -608,48 +910,40 @@ class ManualControlFrame(ttk.Frame):
     @staticmethod
     def _split_host_port(value: str) -> tuple[str, int]:
         candidate = value.strip()
-        if candidate.startswith('http://') or candidate.startswith('https://'):
-            candidate = candidate.split('://', 1)[1]
-        if '/' in candidate:
-            candidate = candidate.split('/', 1)[0]
+        if '://' not in candidate:
+            candidate = f"http://{candidate}"
+        try:
+            parts = urlsplit(candidate)
+        except ValueError:
+            # Malformed input such as an unbalanced '['; keep the raw host text with the default port.
+            raw = candidate.split('://', 1)[1].split('/', 1)[0]
+            return raw or 'raspberrypi', DEFAULT_REMOTE_PORT
+        netloc = parts.netloc.rpartition('@')[2]
 
-        host = candidate
+        host = parts.hostname or ""
         port_str = ""
-
-        if candidate.startswith('['):
-            closing = candidate.find(']')
-            if closing != -1:
-                host = candidate[1:closing]
-                remainder = candidate[closing + 1:]
-                if remainder.startswith(':'):
-                    port_str = remainder[1:]
+        if netloc.count(':') > 1 and not netloc.startswith('['):
+            # Bare IPv6 literal; only treat the last group as a port when it is numeric.
+            base, _, possible_port = netloc.rpartition(':')
+            host, port_str = (base, possible_port) if possible_port.isdigit() else (netloc, "")
         else:
-            if candidate.count(':') > 1:
-                base, _, possible_port = candidate.rpartition(':')
-                if possible_port.isdigit():
-                    host = base
-                    port_str = possible_port
-                else:
-                    host = candidate
-            elif ':' in candidate:
-                host, port_str = candidate.split(':', 1)
+            try:
+                port_str = str(parts.port or "")
+            except ValueError:
+                port_str = ""
 
-        port = DEFAULT_REMOTE_PORT
-        if port_str.isdigit():
-            port = int(port_str)
+        port = int(port_str) if port_str.isdigit() else DEFAULT_REMOTE_PORT
         host = host or 'raspberrypi'
         return host, port
 
     @staticmethod
     def _is_ipv4(value: str) -> bool:
-        value = value.strip().split('/')[0]
-        parts = value.split('.')
-        if len(parts) != 4:
-            return False
+        value = value.strip().split('/', 1)[0]
         try:
-            return all(0 <= int(part) <= 255 for part in parts)
-        except ValueError:
+            socket.inet_pton(socket.AF_INET, value)
+        except (OSError, ValueError):
             return False
+        return True
 
 
 def launch_manual_control() -> None:
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import argparse
 import tkinter as tk
 from tkinter import ttk
 
@@ -55,8 +56,6 @@ def launch_legacy() -> None:
 
 
 def main(argv: list[str] | None = None) -> None:
-    import argparse
-
     parser = argparse.ArgumentParser(description="Capstone Master Control (legacy) launcher")
     parser.add_argument(
         "--legacy",
@@ -0,0 +1,142 @@
+"""SSH and HTTP plumbing shared by the manual control and harness panels."""
+
+from __future__ import annotations
+
+import select
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import suppress
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+import requests
+
+if TYPE_CHECKING:
+    import paramiko
+
+# Hard limit for a single remote SSH command before the session is abandoned.
+SSH_COMMAND_TIMEOUT = 15.0
+SSH_CONNECT_TIMEOUT = 10
+SSH_KEEPALIVE_SECONDS = 30
+
+
+def discard_response(future: Future[requests.Response]) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    future.result().close()
+
+
+def new_ssh_client() -> paramiko.SSHClient:
+    # Deferred so the panels open without loading paramiko/cryptography until SSH is first used.
+    import paramiko
+
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    return client
+
+
+def connect_ssh_client(host: str, user: str, password: str) -> paramiko.SSHClient:
+    client = new_ssh_client()
+    # With a password there is no need to try local keys or an agent first.
+    use_keys = not password
+    client.connect(
+        hostname=host,
+        username=user,
+        password=password,
+        timeout=SSH_CONNECT_TIMEOUT,
+        banner_timeout=5,
+        auth_timeout=SSH_CONNECT_TIMEOUT,
+        look_for_keys=use_keys,
+        allow_agent=use_keys,
+        compress=False,
+    )
+    return client
+
+
+def exec_ssh(client: paramiko.SSHClient, command: str, *, timeout: float = SSH_COMMAND_TIMEOUT) -> Tuple[int, str, str]:
+    transport = client.get_transport()
+    if transport is None:
+        raise RuntimeError("SSH transport unavailable")
+    channel = transport.open_session(timeout=timeout)
+    channel.settimeout(timeout)
+    stdout_chunks: List[bytes] = []
+    stderr_chunks: List[bytes] = []
+    deadline = time.monotonic() + timeout
+    try:
+        channel.exec_command(command)
+        # Drain both streams as data arrives so a chatty or hung remote cannot block the worker.
+        while True:
+            if channel.recv_ready():
+                stdout_chunks.append(channel.recv(4096))
+                continue
+            if channel.recv_stderr_ready():
+                stderr_chunks.append(channel.recv_stderr(4096))
+                continue
+            if channel.exit_status_ready():
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Remote command did not finish within {timeout:.0f}s")
+            select.select([channel], [], [], min(0.5, remaining))
+        while channel.recv_ready():
+            stdout_chunks.append(channel.recv(4096))
+        while channel.recv_stderr_ready():
+            stderr_chunks.append(channel.recv_stderr(4096))
+        exit_code = channel.recv_exit_status()
+    finally:
+        channel.close()
+    stdout_text = b"".join(stdout_chunks).decode(errors="replace")
+    stderr_text = b"".join(stderr_chunks).decode(errors="replace")
+    return exit_code, stdout_text, stderr_text
+
+
+class SSHClientCache:
+    """One live SSH connection per (host, user), shared by every worker of a panel."""
+
+    def __init__(self) -> None:
+        self._clients: Dict[Tuple[str, str], paramiko.SSHClient] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str, user: str, password: str) -> paramiko.SSHClient:
+        key = (host, user)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                transport = client.get_transport()
+                if transport is not None and transport.is_active():
+                    return client
+                self._clients.pop(key, None)
+        if client is not None:
+            with suppress(Exception):
+                client.close()
+
+        client = connect_ssh_client(host, user, password)
+        transport = client.get_transport()
+        if transport is not None:
+            # Keeps idle cached sessions from being dropped by NAT or the hotspot between clicks.
+            transport.set_keepalive(SSH_KEEPALIVE_SECONDS)
+        with self._lock:
+            existing = self._clients.get(key)
+            existing_transport = existing.get_transport() if existing is not None else None
+            if existing_transport is not None and existing_transport.is_active():
+                # Another worker connected first; keep a single session per host.
+                with suppress(Exception):
+                    client.close()
+                return existing  # type: ignore[return-value]
+            self._clients[key] = client
+        return client
+
+    def drop(self, host: str, user: str) -> None:
+        with self._lock:
+            client = self._clients.pop((host, user), None)
+        if client is not None:
+            with suppress(Exception):
+                client.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            with suppress(Exception):
+                client.close()
@@ -3,18 +3,22 @@
 from __future__ import annotations
 
 import base64
+import codecs
 import os
 import re
+import select
 import shlex
 import subprocess
 import sys
 import threading
 import time
 import webbrowser
-from contextlib import suppress
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager, suppress
+from functools import lru_cache
 from subprocess import Popen
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set, Tuple
 import tkinter as tk
 from tkinter import PhotoImage, filedialog, messagebox
 from tkinter import ttk
@@ -22,12 +26,16 @@ from tkinter.scrolledtext import ScrolledText
 
 import cv2
 import numpy as np
-import paramiko
 import pymysql
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 from pymysql.cursors import DictCursor
 
+from remote_helpers import SSHClientCache, connect_ssh_client, discard_response, exec_ssh
+
+if TYPE_CHECKING:
+    import paramiko
+
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
@@ -43,14 +51,55 @@ from recognition_core import (  # noqa: E402
 )
 
 FLASK_API_DIR = PROJECT_ROOT / "flask_api"
-load_dotenv(PROJECT_ROOT / ".env", override=False)
-load_dotenv(FLASK_API_DIR / ".env", override=False)
 
 CONSOLE_FLAG = getattr(subprocess, "CREATE_NEW_CONSOLE", 0)
 DEFAULT_REMOTE_PORT = 5001
 # Prioritize the hotspot's mDNS hostname before other fallbacks.
 HOST_FALLBACKS = ("raspberrypi.local", "raspberrypi")
 INTEGRATED_JOB_KEY = "integrated_recognition"
+LOG_TAIL_LINES = 200
+LOG_BATCH_BYTES = 65536
+HARNESS_LOG_MAX_LINES = 1000
+LOG_WINDOW_MAX_LINES = 2000
+# Largest size the live preview is shown at; remote captures are decoded no larger than needed.
+PREVIEW_MAX_SIZE = (640, 480)
+PREVIEW_INTERVAL_MS = 750
+PREVIEW_MAX_BACKOFF_MS = 6000
+CAMERA_IDLE_RELEASE_SECONDS = 60.0
+DB_CONNECTION_TTL = 300.0
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+    (1, cv2.IMREAD_COLOR),
+)
+
+
+def _reuse_buffer(buffer: Optional[np.ndarray], shape: tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+    if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+        return np.empty(shape, dtype=dtype)
+    return buffer
+
+
+def _frame_to_ppm(frame: np.ndarray) -> bytes:
+    # Built on worker threads so Tk only has to copy raw pixels; no PNG encode or base64 on the UI thread.
+    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    height, width = rgb.shape[:2]
+    return b"P6\n%d %d\n255\n" % (width, height) + rgb.tobytes()
+
+
+def _trim_text_lines(widget: tk.Text, line_count: int, max_lines: int) -> int:
+    # Callers track line counts in Python so the widget is only touched once it overflows.
+    if line_count <= max_lines:
+        return line_count
+    widget.delete("1.0", f"{line_count - max_lines + 1}.0")
+    return max_lines
+
+
+@lru_cache(maxsize=32)
+def _pkill_command(pattern: str) -> str:
+    escaped_pattern = pattern.replace("'", "'\\''")
+    return f"bash -lc \"pkill -f '{escaped_pattern}' || true\""
 
 
 class HarnessFrame(ttk.Frame):
@@ -111,17 +160,45 @@ class HarnessFrame(ttk.Frame):
         self._last_remote_base: Optional[str] = None
         self._ssh_discovered_ip: Optional[str] = None
         self._remote_jobs: Dict[str, Dict[str, Any]] = {}
+        self._ssh_clients = SSHClientCache()
         self._preview_window: Optional[tk.Toplevel] = None
         self._preview_label: Optional[ttk.Label] = None
         self._preview_running = False
         self._preview_fetch_inflight = False
         self._preview_photo: Optional[PhotoImage] = None
+        self._preview_photo_size: Optional[tuple[int, int]] = None
         self._preview_last_error: Optional[str] = None
+        self._preview_failures = 0
+        self._preview_decode_scale = 1
+        self._preview_decode_flag = cv2.IMREAD_COLOR
+        self._face_engine: Optional[FaceRecognitionEngine] = None
+        self._face_engine_lock = threading.Lock()
+        self._camera: Optional[cv2.VideoCapture] = None
+        self._camera_lock = threading.Lock()
+        self._camera_release_timer: Optional[threading.Timer] = None
+        self._db_conn: Optional[pymysql.connections.Connection] = None
+        self._db_conn_used = 0.0
+        self._db_lock = threading.Lock()
+        self._preview_fit_cache: Optional[tuple[tuple[int, int], Optional[tuple[int, int]]]] = None
+        # Only one preview fetch runs at a time, so its scratch buffers can be reused frame to frame.
+        self._preview_resize_buf: Optional[np.ndarray] = None
+        self._preview_rgb_buf: Optional[np.ndarray] = None
         self._log_windows: Dict[str, Dict[str, Any]] = {}
         self._flask_running_mode: Optional[str] = None
         self._flask_local_process: Optional[Popen] = None
         self._flask_remote: bool = False
         self._flask_job_key = "flask_server"
+        # Short-lived button actions share these threads; log tails, the live preview and
+        # process waits keep dedicated threads so a slow SSH job cannot stall them.
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="harness")
+        # Endpoint probes are fanned out from a pool worker; a separate pool keeps them from waiting behind it.
+        self._probe_pool = ThreadPoolExecutor(max_workers=5, thread_name_prefix="harness-probe")
+        # Keep-alive pool shared by every API call made from this frame.
+        self._session = requests.Session()
+        # Room for the robot plus every local Flask candidate, so probes do not evict each other's pools.
+        adapter = HTTPAdapter(pool_connections=6, pool_maxsize=4, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
 
         main = ttk.Frame(self, padding=12)
         main.pack(fill="both", expand=True)
@@ -213,28 +290,61 @@ class HarnessFrame(ttk.Frame):
 
         self.log_box = ScrolledText(main, height=12, state="disabled")
         self.log_box.pack(fill="both", expand=True)
+        self.log_box.tag_config("error", foreground="red")
+        self._log_line_count = 0
+        self._log_pending: List[Tuple[str, bool]] = []
+        self._log_pending_lock = threading.Lock()
 
         self.log("Harness ready. Use the controls above to run common workflows.")
         self._update_mode_ui()
         self._update_flask_buttons()
+        self.bind("<Destroy>", self._on_destroy, add="+")
+
+    def _on_destroy(self, event: tk.Event) -> None:
+        if event.widget is not self:
+            return
+        # Pool workers are not daemon threads; drop queued jobs so closing the window does not wait on them.
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._probe_pool.shutdown(wait=False, cancel_futures=True)
+        self._release_camera()
+        self._close_db_connection()
+        self._ssh_clients.close_all()
+        self._session.close()
 
     # ------------------------------------------------------------------
     # UI helpers
     # ------------------------------------------------------------------
     def log(self, message: str, *, error: bool = False) -> None:
         timestamp = time.strftime("%H:%M:%S")
-        line = f"[{timestamp}] {message}"
-
-        def _append() -> None:
-            self.log_box.configure(state="normal")
-            self.log_box.insert("end", line + "\n")
-            if error:
-                self.log_box.tag_add("error", "end-2l", "end-1l")
-                self.log_box.tag_config("error", foreground="red")
-            self.log_box.see("end")
-            self.log_box.configure(state="disabled")
-
-        self.after(0, _append)
+        line = f"[{timestamp}] {message}\n"
+        with self._log_pending_lock:
+            schedule = not self._log_pending
+            self._log_pending.append((line, error))
+        if schedule:
+            self.after(0, self._flush_log)
+
+    def _flush_log(self) -> None:
+        with self._log_pending_lock:
+            pending, self._log_pending = self._log_pending, []
+        if not pending:
+            return
+        # One insert per flush: runs of lines with the same tag are joined into (text, tags) pairs.
+        segments: List[Tuple[List[str], bool]] = []
+        added = 0
+        for line, error in pending:
+            if segments and segments[-1][1] == error:
+                segments[-1][0].append(line)
+            else:
+                segments.append(([line], error))
+            added += line.count("\n")
+        insert_args: List[Any] = []
+        for lines, error in segments:
+            insert_args.extend(("".join(lines), ("error",) if error else ()))
+        self.log_box.configure(state="normal")
+        self.log_box.insert("end", *insert_args)
+        self._log_line_count = _trim_text_lines(self.log_box, self._log_line_count + added, HARNESS_LOG_MAX_LINES)
+        self.log_box.see("end")
+        self.log_box.configure(state="disabled")
 
     def _show_info(self, title: str, message: str) -> None:
         self.after(0, lambda: messagebox.showinfo(title, message))
@@ -253,9 +363,9 @@ class HarnessFrame(ttk.Frame):
             else:
                 self.log(f"{title} launched")
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._pool.submit(_worker)
 
-    def _ensure_log_window(self, job_key: str, title: str, host: str, log_path: str) -> None:
+    def _ensure_log_window(self, job_key: str, title: str, host: str, log_path: str, *, restart: bool = True) -> None:
         meta = self._log_windows.get(job_key)
         window_exists = bool(meta and meta.get('window') and meta['window'].winfo_exists())
         if not window_exists:
@@ -270,20 +380,38 @@ class HarnessFrame(ttk.Frame):
                 'text': text_widget,
                 'host': host,
                 'log': log_path,
+                'tail_cmd': f'tail -n {LOG_TAIL_LINES} -F {shlex.quote(log_path)}',
                 'thread': None,
                 'stop_event': None,
+                'client': None,
+                'lines': 0,
                 'active': True,
                 'last_error': None,
             }
             self._log_windows[job_key] = meta
         else:
             top = meta['window']  # type: ignore[index]
+            thread = meta.get('thread')  # type: ignore[union-attr]
+            if (
+                not restart
+                and meta.get('active')  # type: ignore[union-attr]
+                and meta.get('host') == host  # type: ignore[union-attr]
+                and meta.get('log') == log_path  # type: ignore[union-attr]
+                and isinstance(thread, threading.Thread)
+                and thread.is_alive()
+            ):
+                # Attaching to a job tail -F is already following; restarting would only replay the tail.
+                # A relaunch passes restart=True so the truncated log starts from a clean widget.
+                top.deiconify()
+                top.lift()
+                return
             if meta['text'].winfo_exists():  # type: ignore[index]
                 self._clear_log_widget(meta)
             self._stop_log_stream(job_key)
             meta.update({
                 'host': host,
                 'log': log_path,
+                'tail_cmd': f'tail -n {LOG_TAIL_LINES} -F {shlex.quote(log_path)}',
                 'active': True,
                 'last_error': None,
             })
@@ -302,6 +430,7 @@ class HarnessFrame(ttk.Frame):
         widget.configure(state='normal')
         widget.delete('1.0', 'end')
         widget.configure(state='disabled')
+        meta['lines'] = 0
 
     def _close_log_window(self, job_key: str) -> None:
         meta = self._log_windows.get(job_key)
@@ -336,6 +465,11 @@ class HarnessFrame(ttk.Frame):
         stop_event = meta.get('stop_event')
         if isinstance(stop_event, threading.Event):
             stop_event.set()
+        client = meta.get('client')
+        if client is not None:
+            # Tearing down the transport marks the channel closed, which wakes the worker's select() at once.
+            with suppress(Exception):
+                client.close()
         thread = meta.get('thread')
         if isinstance(thread, threading.Thread) and thread.is_alive() and thread is not threading.current_thread():
             thread.join(timeout=0.5)
@@ -355,50 +489,66 @@ class HarnessFrame(ttk.Frame):
             user = self.remote_user.get().strip() or 'root1'
             password = self.remote_password.get()
             log_path = meta.get('log')
-            if not host or not log_path:
+            command = meta.get('tail_cmd')
+            if not host or not log_path or not command:
                 self.after(0, lambda key=job_key: self._handle_log_error(key, 'Missing host or log path'))
                 break
 
             client: Optional[paramiko.SSHClient] = None
             channel = None
             try:
-                client = paramiko.SSHClient()
-                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                client.connect(hostname=host, username=user, password=password, timeout=10)
+                client = connect_ssh_client(host, user, password)
                 transport = client.get_transport()
                 if transport is None:
                     raise RuntimeError('SSH transport unavailable')
                 channel = transport.open_session()
-                command = f'tail -n 200 -F {shlex.quote(str(log_path))}'
                 channel.exec_command(command)
+                # A restart may have replaced this worker while it was connecting; never touch the new stream's entry.
+                if meta.get('stop_event') is stop_event:
+                    meta['client'] = client
+                # Batches can end mid-character; carry partial UTF-8 sequences into the next one.
+                decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
 
                 while not stop_event.is_set():
-                    if channel.recv_ready():
+                    # Wakes on new output, EOF, or _stop_log_stream closing the client.
+                    select.select([channel], [], [], 1.0)
+                    if stop_event.is_set():
+                        break
+                    # Drain everything already buffered so a burst of output lands in one Text insert.
+                    chunks: List[bytes] = []
+                    pending = 0
+                    while channel.recv_ready() and pending < LOG_BATCH_BYTES:
                         chunk = channel.recv(4096)
-                        if chunk:
-                            text = chunk.decode('utf-8', errors='replace')
-                            self.after(0, lambda t=text, key=job_key: self._append_log_text_for_job(key, t))
+                        if not chunk:
+                            break
+                        chunks.append(chunk)
+                        pending += len(chunk)
+                    text = decoder.decode(b''.join(chunks)) if chunks else ''
+                    if text:
+                        self.after(0, lambda t=text, key=job_key: self._append_log_text_for_job(key, t))
                     if channel.recv_stderr_ready():
                         err = channel.recv_stderr(1024)
                         if err:
                             message = err.decode('utf-8', errors='replace').strip()
                             if message:
                                 self.after(0, lambda key=job_key, msg=message: self._handle_log_error(key, msg))
-                    if channel.exit_status_ready():
+                    if channel.exit_status_ready() or (channel.eof_received and not channel.recv_ready()):
                         exit_status = channel.recv_exit_status()
                         if exit_status != 0:
                             self.after(0, lambda key=job_key, status=exit_status: self._handle_log_error(key, f'tail exited with status {status}'))
                         break
-                    if stop_event.wait(0.2):
-                        break
 
                 backoff = 2.0
             except Exception as exc:  # noqa: BLE001
+                if stop_event.is_set():
+                    break
                 self.after(0, lambda key=job_key, msg=str(exc): self._handle_log_error(key, msg))
                 if stop_event.wait(backoff):
                     break
                 backoff = min(backoff * 2, 30.0)
             finally:
+                if meta.get('stop_event') is stop_event and meta.get('client') is client:
+                    meta['client'] = None
                 if channel is not None:
                     try:
                         channel.close()
@@ -416,7 +566,7 @@ class HarnessFrame(ttk.Frame):
                 break
 
         meta = self._log_windows.get(job_key)
-        if meta:
+        if meta and meta.get('stop_event') is stop_event:
             meta['thread'] = None
             meta['stop_event'] = None
 
@@ -428,24 +578,17 @@ class HarnessFrame(ttk.Frame):
             password = self.remote_password.get()
 
             def _remote_worker() -> None:
-                client: Optional[paramiko.SSHClient] = None
                 try:
-                    client = paramiko.SSHClient()
-                    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                    client.connect(hostname=host, username=user, password=password, timeout=10)
+                    client = self._ssh_clients.get(host, user, password)
                     quoted = shlex.quote(log_path)
                     command = f"bash -lc \"(truncate -s 0 {quoted}) 2>/dev/null || : > {quoted}\""
-                    stdin, stdout, stderr = client.exec_command(command)
-                    stdout.channel.recv_exit_status()
+                    exec_ssh(client, command)
                     self.log(f"[CONTROL] Cleared remote log {log_path}")
                 except Exception as exc:  # noqa: BLE001
+                    self._ssh_clients.drop(host, user)
                     self.log(f"[CONTROL] Failed to clear remote log {log_path}: {exc}", error=True)
-                finally:
-                    if client is not None:
-                        with suppress(Exception):
-                            client.close()
 
-            threading.Thread(target=_remote_worker, daemon=True).start()
+            self._pool.submit(_remote_worker)
             return
 
         def _local_worker() -> None:
@@ -458,7 +601,7 @@ class HarnessFrame(ttk.Frame):
             except Exception as exc:  # noqa: BLE001
                 self.log(f"Failed to clear log {log_path}: {exc}", error=True)
 
-        threading.Thread(target=_local_worker, daemon=True).start()
+        self._pool.submit(_local_worker)
 
     def _append_log_text(self, meta: Dict[str, Any], text: str) -> None:
         widget = meta.get('text')
@@ -466,6 +609,7 @@ class HarnessFrame(ttk.Frame):
             return
         widget.configure(state='normal')
         widget.insert('end', text)
+        meta['lines'] = _trim_text_lines(widget, meta.get('lines', 0) + text.count('\n'), LOG_WINDOW_MAX_LINES)
         widget.see('end')
         widget.configure(state='disabled')
 
@@ -517,15 +661,9 @@ class HarnessFrame(ttk.Frame):
             if not quiet:
                 self.log(f"[CONTROL] Sending stop signal for {title} on {host}...")
             try:
-                client = paramiko.SSHClient()
-                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                client.connect(hostname=host, username=user, password=password, timeout=10)
-                escaped_pattern = target_pattern.replace("'", "'\\''")
-                shell_cmd = f"bash -lc \"pkill -f '{escaped_pattern}' || true\""
-                stdin, stdout, stderr = client.exec_command(shell_cmd)
-                stderr_output = stderr.read().decode().strip()
-                stdout.channel.recv_exit_status()
-                client.close()
+                client = self._ssh_clients.get(host, user, password)
+                _, _, stderr_output = exec_ssh(client, _pkill_command(target_pattern))
+                stderr_output = stderr_output.strip()
                 self._remote_jobs.pop(job_key, None)
                 if stderr_output and not quiet:
                     self.log(f"[CONTROL] Stop {title} stderr: {stderr_output}")
@@ -534,11 +672,12 @@ class HarnessFrame(ttk.Frame):
                 if log_meta:
                     self.after(0, lambda: self._append_log_text(log_meta, "\n[CONTROL] Stop signal dispatched.\n"))
             except Exception as exc:  # noqa: BLE001
+                self._ssh_clients.drop(host, user)
                 if not quiet:
                     self.log(f"[CONTROL] Failed to stop {title}: {exc}", error=True)
                     self._show_error(title, str(exc))
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._pool.submit(_worker)
 
     # ------------------------------------------------------------------
     # Control-mode helpers
@@ -583,7 +722,7 @@ class HarnessFrame(ttk.Frame):
         for base in candidates:
             url = base + path
             try:
-                response = requests.request(method, url, headers=headers, timeout=timeout, **kwargs)
+                response = self._session.request(method, url, headers=headers, timeout=timeout, **kwargs)
                 response.raise_for_status()
             except requests.RequestException as exc:  # noqa: BLE001
                 last_exc = exc
@@ -617,7 +756,7 @@ class HarnessFrame(ttk.Frame):
             self.log(f"[CONTROL] Remote status ({base}): {body}")
             self._show_info("Remote Status", str(body))
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._pool.submit(_worker)
 
     def _run_remote_command(
         self,
@@ -627,6 +766,7 @@ class HarnessFrame(ttk.Frame):
         background: bool = True,
         job_key: Optional[str] = None,
         job_pattern: Optional[str] = None,
+        replace_pattern: Optional[str] = None,
     ) -> None:
         host = self.remote_host.get().strip()
         user = self.remote_user.get().strip() or "root1"
@@ -639,9 +779,12 @@ class HarnessFrame(ttk.Frame):
         def _worker() -> None:
             self.log(f"[CONTROL] Executing {title} via SSH on {host}")
             try:
-                client = paramiko.SSHClient()
-                client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                client.connect(hostname=host, username=user, password=password, timeout=10)
+                client = self._ssh_clients.get(host, user, password)
+                if replace_pattern:
+                    # Stop any previous run on this worker's session so the kill cannot race the new launch.
+                    exec_ssh(client, _pkill_command(replace_pattern))
+                    if job_key:
+                        self._remote_jobs.pop(job_key, None)
                 base_cmd = "cd ~/Capstone-CST498 && source .venv311/bin/activate"
                 if background:
                     slug = re.sub(r"[^a-zA-Z0-9]+", "_", title.lower()).strip("_") or "remote_task"
@@ -651,11 +794,9 @@ class HarnessFrame(ttk.Frame):
                     remote_cmd = f"{base_cmd} && {command}"
                 escaped = remote_cmd.replace('"', '\\"')
                 shell_cmd = f"bash -lc \"{escaped}\""
-                stdin, stdout, stderr = client.exec_command(shell_cmd)
-                stdout_data = stdout.read().decode().strip()
-                stderr_output = stderr.read().decode().strip()
-                exit_code = stdout.channel.recv_exit_status()
-                client.close()
+                exit_code, stdout_data, stderr_output = exec_ssh(client, shell_cmd)
+                stdout_data = stdout_data.strip()
+                stderr_output = stderr_output.strip()
                 if exit_code == 0:
                     if background:
                         pid_raw = stdout_data.strip()
@@ -696,19 +837,30 @@ class HarnessFrame(ttk.Frame):
                     self.log(f"[CONTROL] {title} failed: {message}", error=True)
                     self._show_error(title, message)
             except Exception as exc:  # noqa: BLE001
+                self._ssh_clients.drop(host, user)
                 self.log(f"[CONTROL] {title} SSH error: {exc}", error=True)
                 self._show_error(title, str(exc))
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._pool.submit(_worker)
 
     def _analyze_frame(self, frame) -> tuple[Optional[np.ndarray], str]:
-        annotated = frame.copy() if frame is not None else None
+        # Callers hand over a frame they no longer need, so boxes are drawn on it in place.
+        annotated = frame
         summary = "No faces detected."
         if frame is None:
             return annotated, summary
         try:
-            engine = FaceRecognitionEngine(frame_skip=1)
-            detections = engine.analyze_frame(frame, skip_frame_check=True)
+            # Building the engine loads every known encoding, so keep one around between snapshots.
+            # The lock only serialises analysis; invalidation swaps the reference without taking it.
+            with self._face_engine_lock:
+                engine = self._face_engine
+                if engine is None:
+                    engine = FaceRecognitionEngine(frame_skip=1)
+                    self._face_engine = engine
+                elif not engine.known_encodings or engine.should_refresh():
+                    # An empty load (DB down, no cache yet) or a stale one must not stick for the session.
+                    engine.refresh_known_faces()
+                detections = engine.analyze_frame(frame, skip_frame_check=True)
             if detections:
                 lines = []
                 for result in detections:
@@ -726,20 +878,13 @@ class HarnessFrame(ttk.Frame):
             self.log(f"Face recognition engine unavailable: {exc}", error=True)
         return annotated, summary
 
-    def _show_snapshot_popup(self, annotated, summary: str) -> None:
+    def _show_snapshot_popup(self, ppm: bytes, summary: str) -> None:
         popup = tk.Toplevel(self.root)
         popup.title("Face Snapshot")
         popup.resizable(False, False)
 
-        success, encoded_img = cv2.imencode(".png", annotated)
-        if not success:
-            popup.destroy()
-            self._show_error("Face Snapshot", "Unable to encode snapshot as PNG.")
-            return
-
-        encoded = base64.b64encode(encoded_img.tobytes()).decode("ascii")
         try:
-            photo = PhotoImage(data=encoded, format="PNG")
+            photo = PhotoImage(master=popup, data=ppm, format="PPM")
         except Exception as exc:  # noqa: BLE001
             popup.destroy()
             self._show_error("Face Snapshot", f"Unable to render image: {exc}")
@@ -784,10 +929,11 @@ class HarnessFrame(ttk.Frame):
                 self._show_error("Remote Snapshot", "Received frame but could not process it.")
                 return
 
-            self.after(0, lambda: self._show_snapshot_popup(annotated, summary))
+            ppm = _frame_to_ppm(annotated)
+            self.after(0, self._show_snapshot_popup, ppm, summary)
             self.log("[CONTROL] Snapshot captured from robot camera")
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._pool.submit(_worker)
 
     def _discover_remote_base(self) -> None:
         user = self.remote_user.get().strip() or "root1"
@@ -803,18 +949,16 @@ class HarnessFrame(ttk.Frame):
             for host in candidates:
                 self.log(f"[CONTROL] Detecting API endpoint via {user}@{host}...")
                 try:
-                    client = paramiko.SSHClient()
-                    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                    client.connect(hostname=host, username=user, password=password, timeout=10)
+                    client = self._ssh_clients.get(host, user, password)
                     detect_cmd = (
                         "set -o pipefail; "
                         "(hostname -I || ip -o addr show | awk '{print $4}')"
                     )
-                    stdin, stdout, stderr = client.exec_command(f"bash -lc \"{detect_cmd}\"")
-                    output = stdout.read().decode().strip()
-                    error_output = stderr.read().decode().strip()
-                    client.close()
+                    _, output, error_output = exec_ssh(client, f"bash -lc {shlex.quote(detect_cmd)}")
+                    output = output.strip()
+                    error_output = error_output.strip()
                 except Exception as exc:  # noqa: BLE001
+                    self._ssh_clients.drop(host, user)
                     last_error = exc
                     continue
 
@@ -851,7 +995,7 @@ class HarnessFrame(ttk.Frame):
             self.log(f"[CONTROL] {message}", error=True)
             self._show_error("Control Mode", message)
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._pool.submit(_worker)
 
     def _candidate_ssh_hosts(self) -> List[str]:
         candidates: List[str] = []
@@ -1037,11 +1181,11 @@ class HarnessFrame(ttk.Frame):
                 self._flask_running_mode = mode
                 self._flask_remote = False
                 self._update_flask_buttons()
-                self.after(2000, self._verify_flask_state)
+                threading.Thread(target=self._await_flask_local_exit, args=(process,), daemon=True).start()
 
             self.after(0, _on_success)
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._pool.submit(_worker)
 
     def _start_flask_remote(self, mode: str) -> None:
         if self._flask_running_mode:
@@ -1096,22 +1240,28 @@ class HarnessFrame(ttk.Frame):
         self._update_flask_buttons()
 
     def _verify_flask_state(self) -> None:
-        if not self._flask_running_mode:
+        if not self._flask_running_mode or not self._flask_remote:
             return
 
-        if self._flask_remote:
-            if self._flask_job_key not in self._remote_jobs:
-                self.log("Flask server did not stay running; resetting controls.", error=True)
-                self._flask_running_mode = None
-                self._flask_remote = False
-                self._update_flask_buttons()
-        else:
-            process = self._flask_local_process
-            if process and process.poll() is not None:
-                self.log("Local Flask process exited unexpectedly; resetting controls.", error=True)
-                self._flask_running_mode = None
-                self._flask_local_process = None
-                self._update_flask_buttons()
+        if self._flask_job_key not in self._remote_jobs:
+            self.log("Flask server did not stay running; resetting controls.", error=True)
+            self._flask_running_mode = None
+            self._flask_remote = False
+            self._update_flask_buttons()
+
+    def _await_flask_local_exit(self, process: Popen) -> None:
+        # Blocks in the OS wait instead of polling the process from Tk timers.
+        process.wait()
+        self.after(0, self._on_flask_local_exit, process)
+
+    def _on_flask_local_exit(self, process: Popen) -> None:
+        # A deliberate stop clears the handle first, so only unexpected exits land here.
+        if self._flask_local_process is not process:
+            return
+        self.log("Local Flask process exited unexpectedly; resetting controls.", error=True)
+        self._flask_running_mode = None
+        self._flask_local_process = None
+        self._update_flask_buttons()
 
     def open_enroll_page(self) -> None:
         if self._is_control_mode():
@@ -1155,19 +1305,33 @@ class HarnessFrame(ttk.Frame):
                     self._show_error("Flask API", f"Remote endpoint unreachable: {exc}")
             else:
                 candidates = [FLASK_APP_URL] + [url for url in ALTERNATIVE_FLASK_URLS if url != FLASK_APP_URL]
-                for url in candidates:
-                    try:
-                        response = requests.get(f"{url}/enroll", timeout=3)
-                        if response.status_code < 500:
-                            message = f"Flask API reachable at {url}"
-                            self.log(message)
-                            self._show_info("Flask API", message)
-                            return
-                    except requests.RequestException as exc:
-                        self.log(f"Flask API unreachable at {url}: {exc}", error=True)
+                # Probe every candidate at once so an unreachable address costs one timeout, not one each.
+                futures = {self._probe_pool.submit(self._session.get, f"{url}/enroll", timeout=3): url for url in candidates}
+                pending = set(futures)
+                reachable: Optional[str] = None
+                while pending and reachable is None:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        url = futures[future]
+                        try:
+                            response = future.result()
+                        except requests.RequestException as exc:
+                            self.log(f"Flask API unreachable at {url}: {exc}", error=True)
+                            continue
+                        response.close()
+                        if response.status_code < 500 and reachable is None:
+                            reachable = url
+                for future in pending:
+                    future.cancel()
+                    future.add_done_callback(discard_response)
+                if reachable:
+                    message = f"Flask API reachable at {reachable}"
+                    self.log(message)
+                    self._show_info("Flask API", message)
+                    return
                 self._show_error("Flask API", "All configured endpoints are unreachable.")
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._pool.submit(_worker)
 
     # ------------------------------------------------------------------
     # Recognition controls
@@ -1187,7 +1351,7 @@ class HarnessFrame(ttk.Frame):
             return
 
         log_path = "/tmp/integrated_recognition_gui.log"
-        self._ensure_log_window(INTEGRATED_JOB_KEY, "Integrated Recognition", host, log_path)
+        self._ensure_log_window(INTEGRATED_JOB_KEY, "Integrated Recognition", host, log_path, restart=False)
         if job_info is not None:
             job_info["log"] = log_path
         else:
@@ -1200,12 +1364,12 @@ class HarnessFrame(ttk.Frame):
 
     def launch_integrated_gui(self) -> None:
         if self._is_control_mode():
-            self._stop_remote_job(INTEGRATED_JOB_KEY, "integrated_recognition_system.py", "Integrated Recognition", quiet=True)
             self._run_remote_command(
                 "python integrated_recognition_system.py --robot",
                 "Integrated Recognition (GUI)",
                 job_key=INTEGRATED_JOB_KEY,
                 job_pattern="integrated_recognition_system.py",
+                replace_pattern="integrated_recognition_system.py",
             )
             self.after(2000, self._schedule_integrated_log_attach)
             return
@@ -1213,12 +1377,12 @@ class HarnessFrame(ttk.Frame):
 
     def launch_integrated_headless(self) -> None:
         if self._is_control_mode():
-            self._stop_remote_job(INTEGRATED_JOB_KEY, "integrated_recognition_system.py", "Integrated Recognition", quiet=True)
             self._run_remote_command(
                 "python integrated_recognition_system.py --robot --headless",
                 "Integrated Recognition (Headless)",
                 job_key=INTEGRATED_JOB_KEY,
                 job_pattern="integrated_recognition_system.py",
+                replace_pattern="integrated_recognition_system.py",
             )
             self.after(2000, self._schedule_integrated_log_attach)
             return
@@ -1261,6 +1425,9 @@ class HarnessFrame(ttk.Frame):
         self._preview_fetch_inflight = False
         self._preview_photo = None
         self._preview_last_error = None
+        self._preview_failures = 0
+        self._preview_decode_scale = 1
+        self._preview_decode_flag = cv2.IMREAD_COLOR
         self._schedule_preview_fetch()
 
     def _close_live_preview(self) -> None:
@@ -1291,38 +1458,78 @@ class HarnessFrame(ttk.Frame):
     def _preview_worker(self) -> None:
         try:
             response = self._remote_request("GET", "/api/manual/capture", timeout=6)
+            if not self._preview_running:
+                # Window closed while the capture was in flight; nobody will see this frame.
+                return
             payload = response.json()
             encoded = payload.get("image")
             if not encoded:
                 raise ValueError("Response missing image field")
             buffer = base64.b64decode(encoded)
             frame_array = np.frombuffer(buffer, dtype=np.uint8)
-            frame = cv2.imdecode(frame_array, cv2.IMREAD_COLOR)
+            frame = cv2.imdecode(frame_array, self._preview_decode_flag)
             if frame is None:
                 raise ValueError("Failed to decode remote image")
-            success, png_buffer = cv2.imencode(".png", frame)
-            if not success:
-                raise ValueError("Unable to encode preview frame")
-            encoded_png = base64.b64encode(png_buffer.tobytes()).decode("ascii")
-            self.after(0, lambda data=encoded_png: self._update_preview_image(data))
+            self._update_preview_decode_scale(frame.shape[1], frame.shape[0])
+            frame = self._fit_preview_frame(frame)
+            # Raw PPM is handed to Tk as bytes: no PNG compression or base64 round trip per frame.
+            self._preview_rgb_buf = _reuse_buffer(self._preview_rgb_buf, frame.shape, frame.dtype)
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._preview_rgb_buf)
+            height, width = rgb.shape[:2]
+            ppm = b"P6\n%d %d\n255\n" % (width, height) + rgb.tobytes()
+            self.after(0, self._update_preview_image, ppm, (width, height))
+            self._preview_failures = 0
         except Exception as exc:  # noqa: BLE001
+            self._preview_failures += 1
             self.after(0, lambda msg=str(exc): self._handle_preview_error(msg))
         finally:
             self._preview_fetch_inflight = False
             if self._preview_running:
-                self._schedule_preview_fetch(750)
+                # Back off while the camera endpoint keeps failing instead of hammering an offline robot.
+                delay = min(PREVIEW_INTERVAL_MS << min(self._preview_failures, 3), PREVIEW_MAX_BACKOFF_MS)
+                self._schedule_preview_fetch(delay)
+
+    def _update_preview_decode_scale(self, width: int, height: int) -> None:
+        # Captures keep the same resolution, so the last frame decides how far JPEG decode can downscale the next.
+        src_w = width * self._preview_decode_scale
+        src_h = height * self._preview_decode_scale
+        ratio = min(PREVIEW_MAX_SIZE[0] / src_w, PREVIEW_MAX_SIZE[1] / src_h, 1.0)
+        for scale, flag in REDUCED_DECODE_FLAGS:
+            if scale * ratio <= 1.0:
+                self._preview_decode_scale = scale
+                self._preview_decode_flag = flag
+                return
 
-    def _update_preview_image(self, encoded_png: str) -> None:
+    def _fit_preview_frame(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        cached = self._preview_fit_cache
+        if cached is not None and cached[0] == (width, height):
+            size = cached[1]
+        else:
+            ratio = min(PREVIEW_MAX_SIZE[0] / width, PREVIEW_MAX_SIZE[1] / height)
+            size = None if ratio >= 1.0 else (max(1, int(width * ratio)), max(1, int(height * ratio)))
+            self._preview_fit_cache = ((width, height), size)
+        if size is None:
+            return frame
+        self._preview_resize_buf = _reuse_buffer(self._preview_resize_buf, (size[1], size[0]) + frame.shape[2:], frame.dtype)
+        return cv2.resize(frame, size, dst=self._preview_resize_buf, interpolation=cv2.INTER_AREA)
+
+    def _update_preview_image(self, ppm: bytes, size: tuple[int, int]) -> None:
         if not self._preview_running or not self._preview_label:
             return
         try:
-            photo = PhotoImage(data=encoded_png, format="PNG")
+            if self._preview_photo is not None and self._preview_photo_size == size:
+                # Same dimensions: reload pixels into the existing image instead of registering a new one.
+                self._preview_photo.configure(data=ppm, format="PPM")
+            else:
+                photo = PhotoImage(master=self, data=ppm, format="PPM")
+                self._preview_photo = photo
+                self._preview_photo_size = size
+                self._preview_label.configure(image=photo, text="")
+                self._preview_label.image = photo
         except Exception as exc:  # noqa: BLE001
             self._handle_preview_error(str(exc))
             return
-        self._preview_photo = photo
-        self._preview_label.configure(image=photo, text="")
-        self._preview_label.image = photo
         self._preview_last_error = None
 
     def _handle_preview_error(self, message: str) -> None:
@@ -1343,18 +1550,13 @@ class HarnessFrame(ttk.Frame):
 
         def _worker() -> None:
             self.log("Capturing face snapshot from default camera...")
-            camera = cv2.VideoCapture(0)
-            if not camera or not camera.isOpened():
+            try:
+                ret, frame = self._read_local_camera()
+            except RuntimeError:
                 self.log("Camera not available", error=True)
                 self._show_error("Snapshot", "Unable to open camera 0.")
                 return
 
-            try:
-                time.sleep(0.3)
-                ret, frame = camera.read()
-            finally:
-                camera.release()
-
             if not ret or frame is None:
                 self.log("Failed to read frame from camera", error=True)
                 self._show_error("Snapshot", "Failed to capture a frame from the camera.")
@@ -1366,10 +1568,71 @@ class HarnessFrame(ttk.Frame):
                 self._show_error("Snapshot", "Captured frame but analysis failed.")
                 return
 
-            self.after(0, lambda: self._show_snapshot_popup(annotated, summary))
+            ppm = _frame_to_ppm(annotated)
+            self.after(0, self._show_snapshot_popup, ppm, summary)
             self.log("Snapshot captured from local camera")
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._pool.submit(_worker)
+
+    def _read_local_camera(self) -> tuple[bool, Optional[np.ndarray]]:
+        # Opening the camera is the slow part of a snapshot; keep it open until it sits idle for a while.
+        with self._camera_lock:
+            if self._camera_release_timer is not None:
+                self._camera_release_timer.cancel()
+                self._camera_release_timer = None
+            camera = self._camera
+            reused = camera is not None and camera.isOpened()
+            if reused:
+                # Drop the frame buffered while idle so the snapshot is current.
+                camera.grab()
+            else:
+                camera = self._open_local_camera()
+            ret, frame = self._grab_frame(camera)
+            if not ret and reused:
+                # A camera that was unplugged or suspended still reports isOpened(); reopen it once.
+                camera.release()
+                self._camera = None
+                camera = self._open_local_camera()
+                ret, frame = self._grab_frame(camera)
+            if not ret:
+                camera.release()
+                self._camera = None
+                return ret, frame
+            timer = threading.Timer(CAMERA_IDLE_RELEASE_SECONDS, self._release_camera)
+            timer.daemon = True
+            timer.start()
+            self._camera_release_timer = timer
+        return ret, frame
+
+    def _open_local_camera(self) -> cv2.VideoCapture:
+        # Caller holds _camera_lock.
+        if sys.platform == "win32":
+            camera = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+        else:
+            camera = cv2.VideoCapture(0)
+        if not camera.isOpened():
+            camera.release()
+            self._camera = None
+            raise RuntimeError("Unable to open camera 0.")
+        camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        self._camera = camera
+        time.sleep(0.3)
+        return camera
+
+    @staticmethod
+    def _grab_frame(camera: cv2.VideoCapture) -> tuple[bool, Optional[np.ndarray]]:
+        if not camera.grab():
+            return False, None
+        return camera.retrieve()
+
+    def _release_camera(self) -> None:
+        with self._camera_lock:
+            if self._camera_release_timer is not None:
+                self._camera_release_timer.cancel()
+                self._camera_release_timer = None
+            camera, self._camera = self._camera, None
+        if camera is not None:
+            camera.release()
 
     def sync_face_encodings(self) -> None:
         def _worker() -> None:
@@ -1386,25 +1649,57 @@ class HarnessFrame(ttk.Frame):
                 return
 
             save_encodings_cache(encodings, names)
+            # Drop the engine so the next snapshot loads the synced encodings.
+            self._face_engine = None
             preview = "\n".join(f"{banner} - {display}" for banner, display in names[:10])
             if len(names) > 10:
                 preview += f"\n... (+{len(names) - 10} more)"
             self.log(f"Synced {len(names)} face(s) to local cache")
             self._show_info("Face Encodings", f"Synced {len(names)} face(s).\n\n{preview}")
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._pool.submit(_worker)
 
     # ------------------------------------------------------------------
     # Database & utility controls
     # ------------------------------------------------------------------
+    @contextmanager
+    def _db_connection(self) -> Iterator[pymysql.connections.Connection]:
+        # One connection is kept between clicks; the lock also keeps it to one query at a time.
+        with self._db_lock:
+            conn, self._db_conn = self._db_conn, None
+            if conn is not None and time.monotonic() - self._db_conn_used > DB_CONNECTION_TTL:
+                with suppress(Exception):
+                    conn.close()
+                conn = None
+            try:
+                if conn is None:
+                    conn = get_db_connection()
+                else:
+                    conn.ping(reconnect=True)
+                yield conn
+                # End the implicit read transaction so the next query sees fresh rows.
+                conn.rollback()
+            except Exception:
+                if conn is not None:
+                    with suppress(Exception):
+                        conn.close()
+                raise
+            self._db_conn = conn
+            self._db_conn_used = time.monotonic()
+
+    def _close_db_connection(self) -> None:
+        with self._db_lock:
+            conn, self._db_conn = self._db_conn, None
+        if conn is not None:
+            with suppress(Exception):
+                conn.close()
+
     def list_users(self) -> None:
         def _worker() -> None:
             self.log("Fetching registered users...")
-            conn: pymysql.connections.Connection | None = None
             rows: list[dict[str, str]] = []
             try:
-                conn = get_db_connection()
-                with conn.cursor(DictCursor) as cur:
+                with self._db_connection() as conn, conn.cursor(DictCursor) as cur:
                     cur.execute(
                         "SELECT banner_id, first_name, last_name, email FROM users ORDER BY banner_id LIMIT 50;"
                     )
@@ -1413,32 +1708,49 @@ class HarnessFrame(ttk.Frame):
                 self.log(f"Database query failed: {exc}", error=True)
                 self._show_error("Database", f"Failed to fetch users: {exc}")
                 return
-            finally:
-                if conn is not None:
-                    conn.close()
 
             if not rows:
                 self.log("No users found in database", error=True)
                 self._show_info("Registered Users", "No users found.")
                 return
 
-            lines = [
-                f"{row['banner_id']} - {row['first_name']} {row['last_name']} ({row['email']})"
+            values = [
+                (row['banner_id'], f"{row['first_name']} {row['last_name']}", row['email'])
                 for row in rows
             ]
-            summary = "\n".join(lines)
-            self._show_info("Registered Users", summary)
+            self.after(0, self._show_users_popup, values)
             self.log(f"Fetched {len(rows)} user(s)")
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._pool.submit(_worker)
+
+    def _show_users_popup(self, values: List[Tuple[str, str, str]]) -> None:
+        popup = tk.Toplevel(self.root)
+        popup.title("Registered Users")
+        popup.geometry("560x360")
+
+        frame_widget = ttk.Frame(popup, padding=10)
+        frame_widget.pack(fill="both", expand=True)
+        frame_widget.columnconfigure(0, weight=1)
+        frame_widget.rowconfigure(0, weight=1)
+
+        tree = ttk.Treeview(frame_widget, columns=("banner_id", "name", "email"), show="headings")
+        for column, heading, width in (("banner_id", "Banner ID", 110), ("name", "Name", 170), ("email", "Email", 240)):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor="w")
+        scrollbar = ttk.Scrollbar(frame_widget, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.grid(row=0, column=0, sticky="nsew")
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        for row in values:
+            tree.insert("", "end", values=row)
+
+        ttk.Button(frame_widget, text="Close", command=popup.destroy).grid(row=1, column=0, columnspan=2, pady=(10, 0))
 
     def check_db_connection(self) -> None:
         def _worker() -> None:
             self.log("Checking database connectivity...")
-            conn: pymysql.connections.Connection | None = None
             try:
-                conn = get_db_connection()
-                with conn.cursor() as cur:
+                with self._db_connection() as conn, conn.cursor() as cur:
                     cur.execute("SELECT COUNT(*) FROM users;")
                     row = cur.fetchone()
                     if isinstance(row, dict):
@@ -1449,15 +1761,12 @@ class HarnessFrame(ttk.Frame):
                 self.log(f"Database connection failed: {exc}", error=True)
                 self._show_error("Database", f"Connection failed: {exc}")
                 return
-            finally:
-                if conn is not None:
-                    conn.close()
 
             message = f"Database connection OK. Users table has {count} record(s)."
             self.log(message)
             self._show_info("Database", message)
 
-        threading.Thread(target=_worker, daemon=True).start()
+        self._pool.submit(_worker)
 
     def run_sign_classifier(self) -> None:
         image_path = filedialog.askopenfilename(title="Select traffic sign image")